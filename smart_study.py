@@ -1,5 +1,6 @@
 import flet as ft
-import os, csv, json, shutil, webbrowser, sys
+import os, csv, json, shutil, webbrowser, sys, hashlib, uuid, marshal, threading, re
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime, date
 
@@ -20,10 +21,17 @@ USERS_CSV = str(DATA_DIR / "users.csv")
 COURSES_CSV = str(DATA_DIR / "courses.csv")
 NOTES_CSV = str(DATA_DIR / "notes.csv")
 PROGRESS_CSV = str(DATA_DIR / "progress.csv")
+CHAPTERS_CSV = str(DATA_DIR / "chapters.csv")
 THEME_JSON = str(DATA_DIR / "theme.json")
+SCAN_STATE_JSON = str(DATA_DIR / "scan_state.json")
+CATALOG_DIR = APP_DIR / "catalog"
+CATALOG_INDEX = str(DATA_DIR / "catalog.idx")
+CATALOG_HISTORY_JSON = str(DATA_DIR / "catalog_history.json")
 
 USER_HEADERS = ["username", "password", "first_time", "class", "board", "stream", "goal"]
-COURSE_HEADERS = ["username", "class", "stream", "subject", "chapters"]
+COURSE_HEADERS = ["username", "class", "stream", "subject", "board", "catalog_version"]
+LEGACY_COURSE_HEADERS = COURSE_HEADERS + ["chapters"]
+CHAPTER_HEADERS = ["username", "subject", "chapter_id", "position", "title", "origin"]
 NOTES_HEADERS = ["username", "title", "filepath", "date"]
 PROGRESS_HEADERS = ["username", "subject", "chapter", "done"]
 
@@ -71,76 +79,123 @@ ensure_csv(USERS_CSV, USER_HEADERS)
 ensure_csv(COURSES_CSV, COURSE_HEADERS)
 ensure_csv(NOTES_CSV, NOTES_HEADERS)
 ensure_csv(PROGRESS_CSV, PROGRESS_HEADERS)
+ensure_csv(CHAPTERS_CSV, CHAPTER_HEADERS)
 
-STREAM_SUBJECTS = {
-    "Class 6": ["Mathematics", "Science", "English", "Social Science"],
-    "Class 7": ["Mathematics", "Science", "English", "Social Science"],
-    "Class 8": ["Mathematics", "Science", "English", "Social Science"],
-    "Class 9": ["Mathematics", "Science", "English", "Social Science"],
-    "Class 10": ["Mathematics", "Science", "English", "Social Science"],
-    "Class 11 - Science (Maths)": ["Physics", "Chemistry", "Mathematics", "English"],
-    "Class 11 - Science (Biology)": ["Physics", "Chemistry", "Biology", "English"],
-    "Class 11 - Commerce": ["Accountancy", "Business Studies", "Economics", "English"],
-    "Class 11 - Humanities": ["History", "Political Science", "Geography", "English"],
-    "Class 12 - Science (Maths)": ["Physics", "Chemistry", "Mathematics", "English"],
-    "Class 12 - Science (Biology)": ["Physics", "Chemistry", "Biology", "English"],
-    "Class 12 - Commerce": ["Accountancy", "Business Studies", "Economics", "English"],
-    "Class 12 - Humanities": ["History", "Political Science", "Geography", "English"],
-    "JEE (PCM)": ["Physics", "Chemistry", "Mathematics"],
-    "NEET (PCB)": ["Physics", "Chemistry", "Biology"]
-}
-
-PRELOADED_CHAPTERS = {
-    "Mathematics": ["Number System", "Algebra Basics", "Geometry Basics", "Mensuration", "Data Handling"],
-    "Science": ["Matter in Our Surroundings", "Is Matter Around Us Pure?", "Atoms and Molecules", "Motion and Measurement of Distances"],
-    "English": ["Prose: Stories & Poems", "Writing Skills", "Grammar"],
-    "Social Science": ["History: Ancient to Medieval", "Geography: Our Environment", "Civics: Democracy & Government"],
-    "Physics": [
-        "Physical World and Measurement", "Kinematics", "Laws of Motion", "Work, Energy and Power",
-        "System of Particles and Rotational Motion", "Gravitation", "Mechanical Properties of Solids",
-        "Mechanical Properties of Fluids", "Thermal Properties of Matter", "Thermodynamics", "Kinetic Theory",
-        "Oscillations", "Waves"
-    ],
-    "Chemistry": [
-        "Some Basic Concepts of Chemistry", "Structure of Atom", "Classification of Elements & Periodicity",
-        "Chemical Bonding", "States of Matter", "Thermodynamics (Basics)", "Equilibrium (Basic)"
-    ],
-    "Mathematics (11)": [
-        "Sets and Functions", "Relations and Functions", "Trigonometric Functions",
-        "Principle of Mathematical Induction", "Complex Numbers", "Linear Inequalities",
-        "Permutations and Combinations", "Binomial Theorem", "Sequences and Series"
-    ],
-    "Biology": [
-        "Diversity in the Living World", "Structural Organisation in Animals and Plants",
-        "Cell Structure and Function", "Plant Kingdom", "Human Physiology (Intro)"
-    ],
-    "Physics (12)": [
-        "Electrostatics", "Current Electricity", "Magnetic Effects of Current and Magnetism",
-        "Electromagnetic Induction", "Alternating Current", "Electromagnetic Waves",
-        "Optics", "Dual Nature of Matter", "Atoms and Nuclei", "Electronic Devices"
-    ],
-    "Chemistry (12)": [
-        "Solid State", "Solutions", "Electrochemistry", "Chemical Kinetics", "Surface Chemistry",
-        "Coordination Compounds", "Haloalkanes and Haloarenes", "Alcohols, Phenols and Ethers",
-        "Aldehydes, Ketones and Carboxylic Acids", "Amines", "Biomolecules"
-    ],
-    "Mathematics (12)": [
-        "Relations and Functions", "Inverse Trigonometric Functions", "Matrices and Determinants",
-        "Continuity and Differentiability", "Application of Derivatives", "Integrals",
-        "Differential Equations", "Probability"
-    ]
-}
-
-def chapters_for(subject):
-    if subject in PRELOADED_CHAPTERS:
-        return PRELOADED_CHAPTERS[subject]
-    if "Math" in subject or (subject == "Mathematics"):
-        return PRELOADED_CHAPTERS.get("Mathematics (11)", PRELOADED_CHAPTERS.get("Mathematics", ["Chapter 1", "Chapter 2"]))
-    if subject == "Chemistry":
-        return PRELOADED_CHAPTERS.get("Chemistry", PRELOADED_CHAPTERS.get("Chemistry (12)", ["Chapter 1", "Chapter 2"]))
-    if subject == "Biology":
-        return PRELOADED_CHAPTERS.get("Biology", ["Chapter 1", "Chapter 2"])
-    return PRELOADED_CHAPTERS.get(subject, ["Chapter 1", "Chapter 2"])
+# --------- Curriculum catalog ---------
+# Data lives in catalog/<board>/<class>.json; it is compiled into a marshal
+# index in DATA_DIR and only recompiled when a source file's content changes
+# (frozen builds unpack the catalog with fresh mtimes on every launch).
+CATALOG_FORMAT = 2
+DEFAULT_BOARD = "CBSE"
+DEFAULT_SUBJECTS = ["Mathematics", "Science"]
+DEFAULT_CHAPTERS = ["Chapter 1", "Chapter 2"]
+
+def catalog_sources():
+    sources = {}
+    for p in sorted(CATALOG_DIR.glob("*/*.json")):
+        sources[p.relative_to(CATALOG_DIR).as_posix()] = hashlib.sha256(p.read_bytes()).hexdigest()
+    return sources
+
+def class_sort_key(class_name):
+    return (0, int(class_name), "") if class_name.isdigit() else (1, 0, class_name)
+
+def compile_catalog(sources):
+    index = {"format": CATALOG_FORMAT, "sources": sources, "versions": {}, "streams": {}, "chapters": {}, "titles": {}}
+    for rel in sources:
+        try:
+            data = read_json(str(CATALOG_DIR / rel), {})
+            board, cls = str(data["board"]), str(data["class"])
+            version = int(data.get("version", 1))
+            streams = {str(k): list(v) for k, v in data.get("streams", {}).items()}
+            chapters = {str(k): list(v) for k, v in data.get("chapters", {}).items()}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError) as e:
+            raise RuntimeError(f"Invalid catalog file {CATALOG_DIR / rel}: {e!r}") from e
+        index["versions"][(board, cls)] = version
+        index["streams"][(board, cls)] = streams
+        for subject, titles in chapters.items():
+            index["chapters"][(board, cls, subject)] = titles
+            index["titles"].setdefault((board, subject), set()).update(titles)
+    index["classes"] = sorted(index["versions"], key=lambda k: (k[0], class_sort_key(k[1])))
+    return index
+
+def load_catalog():
+    sources = catalog_sources()
+    if not sources:
+        raise RuntimeError(f"No curriculum catalog found in {CATALOG_DIR}. The catalog folder must be shipped with the app "
+                           f"(PyInstaller: --add-data \"catalog{os.pathsep}catalog\").")
+    try:
+        with open(CATALOG_INDEX, "rb") as f:
+            cached = marshal.load(f)
+        if isinstance(cached, dict) and cached.get("format") == CATALOG_FORMAT and cached.get("sources") == sources:
+            return cached
+    except (OSError, EOFError, ValueError, TypeError):
+        pass
+    index = compile_catalog(sources)
+    tmp = CATALOG_INDEX + ".tmp"
+    with open(tmp, "wb") as f:
+        marshal.dump(index, f)
+    os.replace(tmp, CATALOG_INDEX)
+    return index
+
+def record_catalog_history(index):
+    # Keep every catalog version's chapter lists so upgrades can diff old against new.
+    try:
+        history = read_json(CATALOG_HISTORY_JSON, {})
+    except (OSError, ValueError):
+        history = {}
+    if not isinstance(history, dict):
+        history = {}
+    changed = False
+    for (board, cls), version in index["versions"].items():
+        key = f"{board}|{cls}|{version}"
+        if key not in history:
+            history[key] = {subj: titles for (b, c, subj), titles in index["chapters"].items() if (b, c) == (board, cls)}
+            changed = True
+    if changed:
+        write_json(CATALOG_HISTORY_JSON, history)
+    return history
+
+CATALOG = load_catalog()
+CATALOG_HISTORY = record_catalog_history(CATALOG)
+
+def catalog_board(board):
+    return board if any(b == board for b, _ in CATALOG["versions"]) else DEFAULT_BOARD
+
+def catalog_version(board, class_name):
+    return CATALOG["versions"].get((catalog_board(board), class_name), 0)
+
+def stream_names(board=DEFAULT_BOARD):
+    board = catalog_board(board)
+    names = []
+    for b, cls in CATALOG["classes"]:
+        if b == board:
+            names.extend(s for s in CATALOG["streams"][(b, cls)] if s not in names)
+    return names
+
+def subjects_for(board, class_name, stream_name):
+    board = catalog_board(board)
+    streams = CATALOG["streams"].get((board, class_name), {})
+    if stream_name in streams:
+        return streams[stream_name]
+    if f"Class {class_name}" in streams:
+        return streams[f"Class {class_name}"]
+    for b, cls in CATALOG["classes"]:
+        if b == board and stream_name in CATALOG["streams"][(b, cls)]:
+            return CATALOG["streams"][(b, cls)][stream_name]
+    return DEFAULT_SUBJECTS
+
+def chapters_for(board, class_name, subject):
+    return CATALOG["chapters"].get((catalog_board(board), class_name, subject)) or DEFAULT_CHAPTERS
+
+def is_catalog_title(board, subject, title):
+    return title in DEFAULT_CHAPTERS or title in CATALOG["titles"].get((catalog_board(board), subject), ())
+
+def previous_catalog_chapters(board, class_name, version, subject):
+    # None when the course predates versioning or that version was never recorded.
+    entry = CATALOG_HISTORY.get(f"{board}|{class_name}|{version}") if version else None
+    if not isinstance(entry, dict):
+        return None
+    return entry.get(subject) or DEFAULT_CHAPTERS
 
 def load_users():
     return read_csv_dicts(USERS_CSV, USER_HEADERS)
@@ -169,28 +224,234 @@ def load_courses():
 def save_courses(rows):
     write_csv_dicts(COURSES_CSV, COURSE_HEADERS, rows)
 
-def ensure_user_courses(username, class_name, stream_name):
+def new_chapter_id():
+    return uuid.uuid4().hex[:12]
+
+def load_chapters():
+    return read_csv_dicts(CHAPTERS_CSV, CHAPTER_HEADERS)
+
+def save_chapters(rows):
+    write_csv_dicts(CHAPTERS_CSV, CHAPTER_HEADERS, rows)
+
+def migrate_legacy_chapters():
+    # Older installs kept chapters as one "||"-joined string on the course row.
+    rows = read_csv_dicts(COURSES_CSV, LEGACY_COURSE_HEADERS)
+    if not any(r["chapters"] for r in rows):
+        return
+    chapters = load_chapters()
+    have = {(c["username"], c["subject"]) for c in chapters}
+    for r in rows:
+        if (r["username"], r["subject"]) in have:
+            continue
+        for i, title in enumerate(x for x in r["chapters"].split("||") if x):
+            chapters.append({"username": r["username"], "subject": r["subject"], "chapter_id": new_chapter_id(), "position": str(i), "title": title})
+    save_chapters(chapters)
+    save_courses(rows)
+
+migrate_legacy_chapters()
+
+def ensure_user_courses(username, class_name, board, stream_name):
+    """Create missing courses for the user's stream and move existing ones to a new class or board.
+
+    Courses that change class or board are resynced against the new catalog list.
+    chapters.csv and courses.csv are each written at most once.
+    """
     rows = load_courses()
-    subjects = STREAM_SUBJECTS.get(stream_name) or STREAM_SUBJECTS.get(f"Class {class_name}") or ["Mathematics", "Science"]
+    subjects = subjects_for(board, class_name, stream_name)
     existing = {(r["username"], r["subject"]) for r in rows}
-    changed = False
+    chapters = load_chapters()
+    progress = load_progress()
+    changed = progress_changed = False
+    for r in rows:
+        if r["username"] != username:
+            continue
+        if r["class"] != class_name or r["board"] != catalog_board(board) or r["stream"] != stream_name:
+            if r["class"] != class_name or r["board"] != catalog_board(board):
+                chapters, progress, relinked = resync_course(chapters, progress, username, r, board, class_name)
+                progress_changed = progress_changed or relinked
+            r["stream"] = stream_name
+            changed = True
     for s in subjects:
         if (username, s) not in existing:
-            chs = chapters_for(s)
-            rows.append({"username": username, "class": class_name, "stream": stream_name, "subject": s, "chapters": "||".join(chs)})
+            rows.append({"username": username, "class": class_name, "stream": stream_name, "subject": s,
+                         "board": catalog_board(board), "catalog_version": str(catalog_version(board, class_name))})
+            chapters, _, _ = edit_chapters(chapters, username, s, [{"op": "add", "title": ch, "origin": "catalog"} for ch in chapters_for(board, class_name, s)])
             changed = True
     if changed:
+        save_chapters(chapters)
         save_courses(rows)
+    if progress_changed:
+        save_progress(progress)
 
-def get_user_courses(username):
-    return [r for r in load_courses() if r["username"] == username]
+def sync_ops(current, done, board, subject, previous, wanted):
+    if wanted == DEFAULT_CHAPTERS:
+        # The catalog has no list for this subject; placeholders only fill an empty course.
+        return [] if current else [{"op": "add", "title": t, "origin": "catalog"} for t in wanted]
+    if previous is None:
+        # Unversioned course: we cannot tell what the user removed, so fill in the
+        # whole list and drop untouched chapters that look like old catalog entries.
+        lost = {r["title"] for r in current if r["title"] not in wanted and
+                (r["origin"] == "catalog" or (not r["origin"] and is_catalog_title(board, subject, r["title"])))}
+        gained = list(wanted)
+    else:
+        lost = set(previous) - set(wanted)
+        gained = [t for t in wanted if t not in previous]
+    have = {r["title"] for r in current}
+    ops = []
+    for r in current:
+        if r["title"] in lost and r["title"] not in done and r["origin"] != "user":
+            ops.append({"op": "remove", "id": r["chapter_id"]})
+    for title in gained:
+        if title not in have:
+            ops.append({"op": "add", "title": title, "position": wanted.index(title), "origin": "catalog"})
+    return ops
+
+def resync_course(chapters, progress, username, course, board, class_name):
+    """Move one course row to (board, class_name) at the current catalog version.
 
-def update_course_chapters(username, subject, new_chapters):
+    Only the difference between the course's previous catalog list and the new
+    one is applied, so chapters the user renamed, removed or ticked are kept as
+    they are. Returns (chapters, progress, progress_changed).
+    """
+    board = catalog_board(board)
+    subject = course["subject"]
+    previous = previous_catalog_chapters(course["board"], course["class"], course["catalog_version"], subject)
+    wanted = chapters_for(board, class_name, subject)
+    ops = sync_ops(get_chapters(username, subject, chapters), done_chapters(username, subject, progress), board, subject, previous, wanted)
+    relinked = False
+    if ops:
+        chapters, renamed, removed = edit_chapters(chapters, username, subject, ops)
+        if renamed or removed:
+            progress = relink_progress(progress, username, subject, renamed, removed)
+            relinked = True
+    course["board"] = board
+    course["class"] = class_name
+    course["catalog_version"] = str(catalog_version(board, class_name))
+    return chapters, progress, relinked
+
+def upgrade_user_courses(username, board=""):
+    """Bring a user's courses up to the installed catalog version.
+
+    Only courses whose stored catalog_version is behind are touched, and
+    nothing is written when every row is already current.
+    """
     rows = load_courses()
+    chapters = progress = None
+    changed = progress_changed = False
     for r in rows:
+        if r["username"] != username:
+            continue
+        b = catalog_board(r["board"] or board)
+        version = catalog_version(b, r["class"])
+        if not version or r["catalog_version"] == str(version):
+            continue
+        if chapters is None:
+            chapters, progress = load_chapters(), load_progress()
+        chapters, progress, relinked = resync_course(chapters, progress, username, r, b, r["class"])
+        progress_changed = progress_changed or relinked
+        changed = True
+    if changed:
+        save_chapters(chapters)
+        save_courses(rows)
+    if progress_changed:
+        save_progress(progress)
+
+def get_user_courses(username):
+    return [r for r in load_courses() if r["username"] == username]
+
+def get_chapters(username, subject, rows=None):
+    rows = load_chapters() if rows is None else rows
+    mine = [r for r in rows if r["username"] == username and r["subject"] == subject]
+    return sorted(mine, key=lambda r: int(r["position"] or 0))
+
+def chapter_titles(username, subject, rows=None):
+    return [r["title"] for r in get_chapters(username, subject, rows)]
+
+def edit_chapters(chapters, username, subject, ops):
+    """Apply a batch of chapter edits for one subject to in-memory rows.
+
+    Each op is a dict: {"op": "add", "title", "position"?, "origin"?}, {"op": "remove", "id"},
+    {"op": "rename", "id", "title"} or {"op": "reorder", "ids"}. Adding a title
+    the subject already has is skipped, so a pasted syllabus may overlap.
+    Raises ValueError on unknown or repeated ids, empty titles, or a rename onto
+    an existing title. A renamed chapter becomes the user's own (origin "user").
+    Returns (chapters, renamed, removed) where renamed maps old title to new
+    and removed is a set of titles, for relink_progress().
+    """
+    others = [r for r in chapters if not (r["username"] == username and r["subject"] == subject)]
+    mine = get_chapters(username, subject, chapters)
+    by_id = {r["chapter_id"]: r for r in mine}
+    original = {r["chapter_id"]: r["title"] for r in mine}
+
+    def lookup(cid):
+        if cid not in by_id:
+            raise ValueError(f"Unknown chapter id: {cid}")
+        return by_id[cid]
+
+    for op in ops:
+        kind = op.get("op")
+        if kind == "add":
+            title = (op.get("title") or "").strip()
+            if not title or any(r["title"] == title for r in mine):
+                continue
+            row = {"username": username, "subject": subject, "chapter_id": new_chapter_id(), "position": "", "title": title, "origin": op.get("origin", "user")}
+            pos = op.get("position")
+            mine.insert(len(mine) if pos is None else max(0, min(int(pos), len(mine))), row)
+            by_id[row["chapter_id"]] = row
+        elif kind == "remove":
+            row = lookup(op.get("id"))
+            mine.remove(row)
+            del by_id[row["chapter_id"]]
+        elif kind == "rename":
+            row = lookup(op.get("id"))
+            title = (op.get("title") or "").strip()
+            if not title:
+                raise ValueError("Chapter title cannot be empty")
+            if title == row["title"]:
+                continue
+            if any(r["title"] == title for r in mine):
+                raise ValueError(f"Chapter already exists: {title}")
+            row["title"] = title
+            row["origin"] = "user"
+        elif kind == "reorder":
+            ids = list(op.get("ids") or [])
+            id_set = set(ids)
+            if len(id_set) != len(ids):
+                raise ValueError("Reorder lists a chapter more than once")
+            order = [lookup(cid) for cid in ids]
+            mine = order + [r for r in mine if r["chapter_id"] not in id_set]
+        else:
+            raise ValueError(f"Unknown chapter op: {kind}")
+
+    for i, r in enumerate(mine):
+        r["position"] = str(i)
+    renamed = {t: by_id[cid]["title"] for cid, t in original.items() if cid in by_id and by_id[cid]["title"] != t}
+    removed = {t for cid, t in original.items() if cid not in by_id}
+    return others + mine, renamed, removed
+
+def relink_progress(progress, username, subject, renamed, removed):
+    # Renamed chapters keep their ticks; removed chapters lose them.
+    kept = []
+    for r in progress:
         if r["username"] == username and r["subject"] == subject:
-            r["chapters"] = "||".join(new_chapters)
-    save_courses(rows)
+            if r["chapter"] in renamed:
+                r["chapter"] = renamed[r["chapter"]]
+            elif r["chapter"] in removed:
+                continue
+        kept.append(r)
+    return kept
+
+def apply_chapter_ops(username, subject, ops):
+    """Apply edit_chapters() ops for one subject and save chapters.csv once.
+
+    Renames and removals are carried over to progress.csv. Nothing is written
+    if an op raises ValueError.
+    """
+    chapters, renamed, removed = edit_chapters(load_chapters(), username, subject, ops)
+    save_chapters(chapters)
+    if renamed or removed:
+        save_progress(relink_progress(load_progress(), username, subject, renamed, removed))
+    return get_chapters(username, subject, chapters)
 
 def load_notes():
     return read_csv_dicts(NOTES_CSV, NOTES_HEADERS)
@@ -201,6 +462,120 @@ def save_notes(rows):
 def add_note(username, title, filepath):
     append_csv_row(NOTES_CSV, NOTES_HEADERS, {"username": username, "title": title, "filepath": filepath, "date": date.today().isoformat()})
 
+# --------- Upload integrity scan ---------
+def norm_path(path):
+    return os.path.normcase(os.path.abspath(path))
+
+def list_files(root):
+    found = []
+    for dirpath, _, filenames in os.walk(root):
+        for name in filenames:
+            found.append(os.path.join(dirpath, name))
+    return found
+
+def check_pdf(path):
+    h = hashlib.sha256()
+    head = b""
+    tail = b""
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            if not head:
+                head = chunk[:8]
+            h.update(chunk)
+            tail = (tail + chunk)[-1024:]
+    ok = head.startswith(b"%PDF-") and b"%%EOF" in tail
+    return {"sha256": h.hexdigest(), "ok": ok}
+
+def load_scan_state():
+    try:
+        state = read_json(SCAN_STATE_JSON, {})
+    except (OSError, ValueError):
+        return {}
+    return state if isinstance(state, dict) and isinstance(state.get("files"), dict) else {}
+
+def is_user_upload(username, path):
+    # Notes are saved as "<username>_<YYYYmmddHHMMSS>_<original name>".
+    return re.fullmatch(rf"{re.escape(username)}_\d{{14}}_.+", os.path.basename(path)) is not None
+
+def scan_uploads(fix=False, username=None, workers=4):
+    # With a username, the report only covers that user's notes plus the shared
+    # books folder; other users' note rows and files are never touched.
+    cache = load_scan_state().get("files", {})
+    notes_root = norm_path(NOTES_DIR) + os.sep
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        notes_job = pool.submit(list_files, NOTES_DIR)
+        books_job = pool.submit(list_files, BOOKS_DIR)
+        rows_job = pool.submit(load_notes)
+        note_files, book_files, rows = notes_job.result(), books_job.result(), rows_job.result()
+
+        pdfs = {}
+        for fp in note_files + book_files:
+            if not fp.lower().endswith(".pdf"):
+                continue
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            pdfs[norm_path(fp)] = (fp, st.st_size, st.st_mtime_ns)
+        stale = [key for key, (_, size, mtime) in pdfs.items()
+                 if cache.get(key, {}).get("size") != size or cache.get(key, {}).get("mtime") != mtime]
+        results = dict(zip(stale, pool.map(lambda k: check_pdf(pdfs[k][0]), stale)))
+
+    files = {}
+    for key, (fp, size, mtime) in pdfs.items():
+        entry = dict(cache[key]) if key not in results else {"size": size, "mtime": mtime, **results[key]}
+        files[key] = entry
+
+    mine = set()
+    if username is not None:
+        mine = {norm_path(r["filepath"]) for r in rows if r["username"] == username and r["filepath"]}
+        mine.update(norm_path(fp) for fp in note_files if is_user_upload(username, fp))
+    def visible(key):
+        return username is None or key in mine or not key.startswith(notes_root)
+
+    referenced = {norm_path(r["filepath"]) for r in rows if r["filepath"]}
+    dangling = [r for r in rows if (username is None or r["username"] == username)
+                and (not r["filepath"] or not os.path.isfile(r["filepath"]))]
+    orphans = sorted(fp for fp in note_files if norm_path(fp) not in referenced
+                     and (username is None or is_user_upload(username, fp)))
+
+    if fix:
+        # Re-read the table: the user may have uploaded or deleted notes while PDFs were hashed.
+        current = load_notes()
+        gone = {(r["username"], r["filepath"]) for r in dangling}
+        if gone:
+            save_notes([r for r in current if (r["username"], r["filepath"]) not in gone])
+        referenced = {norm_path(r["filepath"]) for r in current if r["filepath"]}
+        removed = []
+        for fp in orphans:
+            if norm_path(fp) in referenced:
+                continue
+            try:
+                os.remove(fp)
+            except OSError:
+                continue
+            files.pop(norm_path(fp), None)
+            removed.append(fp)
+        orphans = removed
+
+    truncated = sorted(pdfs[k][0] for k, v in files.items() if not v.get("ok") and visible(k))
+    by_hash = {}
+    for key, v in files.items():
+        if visible(key):
+            by_hash.setdefault(v.get("sha256"), []).append(pdfs[key][0])
+    duplicates = sorted(sorted(group) for h, group in by_hash.items() if h and len(group) > 1)
+
+    write_json(SCAN_STATE_JSON, {"last_scan": datetime.now().isoformat(timespec="seconds"), "files": files})
+    return {
+        "scanned": len(pdfs),
+        "rehashed": len(stale),
+        "dangling": dangling,
+        "orphans": orphans,
+        "truncated": truncated,
+        "duplicates": duplicates,
+        "fixed": bool(fix)
+    }
+
 def load_progress():
     return read_csv_dicts(PROGRESS_CSV, PROGRESS_HEADERS)
 
@@ -225,12 +600,16 @@ def is_done(username, subject, chapter):
             return r.get("done","no") == "yes"
     return False
 
-def subject_progress_percent(username, subject):
-    chs = chapters_for(subject)
+def done_chapters(username, subject, progress=None):
+    progress = load_progress() if progress is None else progress
+    return {r["chapter"] for r in progress if r["username"]==username and r["subject"]==subject and r.get("done","no")=="yes"}
+
+def subject_progress_percent(username, subject, progress=None, chapters=None):
+    chs = chapter_titles(username, subject, chapters)
     total = len(chs)
     if total == 0:
         return 0
-    done = sum(1 for r in load_progress() if r["username"]==username and r["subject"]==subject and r.get("done","no")=="yes")
+    done = len(done_chapters(username, subject, progress) & set(chs))
     return int((done/total)*100)
 
 def main(page: ft.Page):
@@ -348,11 +727,12 @@ def main(page: ft.Page):
         if rec.get("first_time","yes") == "yes":
             build_onboarding_view()
         else:
+            upgrade_user_courses(uname, rec.get("board", ""))
             build_main_shell()
 
     cb_class = ft.Dropdown(label="Class", options=[ft.dropdown.Option(x) for x in ["6","7","8","9","10","11","12","Dropper"]], width=200)
     cb_board = ft.Dropdown(label="Board", options=[ft.dropdown.Option(x) for x in ["CBSE","ICSE","State Board","Other"]], width=200)
-    cb_stream = ft.Dropdown(label="Stream", options=[ft.dropdown.Option(s) for s in STREAM_SUBJECTS.keys()], width=480)
+    cb_stream = ft.Dropdown(label="Stream", options=[ft.dropdown.Option(s) for s in stream_names()], width=480)
     cb_goal = ft.Dropdown(label="Goal", options=[ft.dropdown.Option(x) for x in ["Boards/CBSE","IIT-JEE","NEET","Other"]], width=260)
     onb_msg = ft.Text("", color=ft.Colors.RED_700)
 
@@ -384,7 +764,7 @@ def main(page: ft.Page):
                 u["goal"] = cb_goal.value
                 u["first_time"] = "no"
         save_users(users)
-        ensure_user_courses(state["user"], cb_class.value, cb_stream.value)
+        ensure_user_courses(state["user"], cb_class.value, cb_board.value, cb_stream.value)
         build_main_shell()
 
     nav = None
@@ -463,31 +843,68 @@ def main(page: ft.Page):
             main_content.content = ft.Container(ft.Text("No courses found. Please set your stream in Settings or run onboarding."), padding=16)
             page.update()
             return
+        all_chapters = load_chapters()
+        all_progress = load_progress()
+        def run_ops(s, ops):
+            try:
+                apply_chapter_ops(state["user"], s, ops)
+            except ValueError as ex:
+                page.snack_bar = ft.SnackBar(ft.Text(str(ex)), open=True)
+                page.update()
+                return
+            show_courses()
+        def open_rename(s, row):
+            field = ft.TextField(label="Chapter name", value=row["title"], width=360)
+            def close(e=None):
+                dlg.open = False
+                page.update()
+            def confirm(e):
+                close()
+                run_ops(s, [{"op": "rename", "id": row["chapter_id"], "title": field.value}])
+            dlg = ft.AlertDialog(title=ft.Text("Rename chapter"), content=field, actions=[ft.TextButton("Cancel", on_click=close), ft.ElevatedButton("Rename", on_click=confirm)])
+            page.dialog = dlg
+            dlg.open = True
+            page.update()
         cards = []
         for c in courses:
             subj = c["subject"]
-            chs = [x for x in c.get("chapters","").split("||") if x]
-            pct = subject_progress_percent(state["user"], subj)
+            rows = get_chapters(state["user"], subj, all_chapters)
+            ids = [r["chapter_id"] for r in rows]
+            done = done_chapters(state["user"], subj, all_progress)
+            pct = subject_progress_percent(state["user"], subj, all_progress, all_chapters)
             progress = ft.ProgressBar(width=300, value=pct/100)
             ch_controls = []
-            def make_cb(s, chapter):
+            def make_row(s, row, i, order):
                 def on_change_cb(ev):
-                    set_progress(state["user"], s, chapter, done=ev.control.value)
+                    set_progress(state["user"], s, row["title"], done=ev.control.value)
                     show_courses()
-                return ft.Checkbox(label=chapter, value=is_done(state["user"], s, chapter), on_change=on_change_cb)
-            for ch in chs:
-                ch_controls.append(make_cb(subj, ch))
-            new_field = ft.TextField(label=f"Add chapter to {subj}", width=300)
-            def make_add_handler(s, field, record):
+                def move(delta):
+                    def h(e):
+                        j = i + delta
+                        if 0 <= j < len(order):
+                            new_order = list(order)
+                            new_order[i], new_order[j] = new_order[j], new_order[i]
+                            run_ops(s, [{"op": "reorder", "ids": new_order}])
+                    return h
+                return ft.Row([
+                    ft.Checkbox(label=row["title"], value=row["title"] in done, on_change=on_change_cb),
+                    ft.Container(expand=True),
+                    ft.IconButton(icon=ft.Icons.ARROW_UPWARD, tooltip="Move up", on_click=move(-1), disabled=i == 0),
+                    ft.IconButton(icon=ft.Icons.ARROW_DOWNWARD, tooltip="Move down", on_click=move(1), disabled=i == len(order) - 1),
+                    ft.IconButton(icon=ft.Icons.EDIT_OUTLINED, tooltip="Rename", on_click=lambda e: open_rename(s, row)),
+                    ft.IconButton(icon=ft.Icons.DELETE_OUTLINE, tooltip="Remove", on_click=lambda e: run_ops(s, [{"op": "remove", "id": row["chapter_id"]}]))
+                ])
+            for i, row in enumerate(rows):
+                ch_controls.append(make_row(subj, row, i, ids))
+            new_field = ft.TextField(label=f"Add chapters to {subj} (one per line)", width=300, multiline=True, min_lines=1, max_lines=6)
+            def make_add_handler(s, field):
                 def h(e):
-                    txt = (field.value or "").strip()
-                    if not txt:
+                    titles = [x.strip() for x in (field.value or "").splitlines() if x.strip()]
+                    if not titles:
                         return
-                    existing = [x for x in record.get("chapters","").split("||") if x]
-                    update_course_chapters(state["user"], s, existing + [txt])
-                    show_courses()
+                    run_ops(s, [{"op": "add", "title": t} for t in titles])
                 return h
-            add_btn = ft.ElevatedButton("Add Chapter", on_click=make_add_handler(subj, new_field, c))
+            add_btn = ft.ElevatedButton("Add Chapters", on_click=make_add_handler(subj, new_field))
             card = ft.Card(content=ft.Container(ft.Column([
                 ft.Row([ft.Text(subj, size=18, weight=ft.FontWeight.W_600), ft.Container(expand=True), ft.Text(f"{pct}%")]),
                 progress,
@@ -591,7 +1008,7 @@ def main(page: ft.Page):
             sel = dd_subject.value
             for c in courses:
                 if c["subject"] == sel:
-                    chs = [x for x in c.get("chapters","").split("||") if x]
+                    chs = chapter_titles(state["user"], sel)
                     dd_chapter.options = [ft.dropdown.Option(x) for x in chs]
                     dd_chapter.value = chs[0] if chs else None
                     break
@@ -666,12 +1083,13 @@ def main(page: ft.Page):
             alln = load_notes()
             new = [x for x in alln if not (x["username"]==rec["username"] and x["filepath"]==rec["filepath"])]
             save_notes(new)
+            msg = "Deleted"
             try:
                 if os.path.exists(rec["filepath"]):
                     os.remove(rec["filepath"])
-            except Exception:
-                pass
-            page.snack_bar = ft.SnackBar(ft.Text("Deleted"), open=True)
+            except Exception as e:
+                msg = f"Deleted entry, file left behind ({e}). Use Check & Fix in Settings to clean up."
+            page.snack_bar = ft.SnackBar(ft.Text(msg), open=True)
             page.update()
             refresh_list()
         refresh_list()
@@ -683,7 +1101,8 @@ def main(page: ft.Page):
         user = [u for u in users if u["username"]==state["user"]][0]
         class_dd = ft.Dropdown(label="Class", options=[ft.dropdown.Option(x) for x in ["6","7","8","9","10","11","12","Dropper"]], value=user.get("class") or "11", width=240)
         board_dd = ft.Dropdown(label="Board", options=[ft.dropdown.Option(x) for x in ["CBSE","ICSE","State Board","Other"]], value=user.get("board") or "CBSE", width=240)
-        stream_dd = ft.Dropdown(label="Stream", options=[ft.dropdown.Option(x) for x in STREAM_SUBJECTS.keys()], value=user.get("stream") or list(STREAM_SUBJECTS.keys())[0], width=480)
+        streams = stream_names(user.get("board") or DEFAULT_BOARD)
+        stream_dd = ft.Dropdown(label="Stream", options=[ft.dropdown.Option(x) for x in streams], value=user.get("stream") or (streams[0] if streams else None), width=480)
         goal_dd = ft.Dropdown(label="Goal", options=[ft.dropdown.Option(x) for x in ["Boards/CBSE","IIT-JEE","NEET","Other"]], value=user.get("goal") or "Boards/CBSE", width=240)
         msg = ft.Text("", color=ft.Colors.GREEN_700)
         def save(e):
@@ -695,10 +1114,64 @@ def main(page: ft.Page):
                     u["stream"] = stream_dd.value or ""
                     u["goal"] = goal_dd.value or ""
             save_users(users2)
-            ensure_user_courses(state["user"], class_dd.value, stream_dd.value)
+            ensure_user_courses(state["user"], class_dd.value, board_dd.value, stream_dd.value)
             msg.value = "Saved"
             page.update()
-        main_content.content = ft.Container(ft.Column([ft.Text("Settings", size=18, weight=ft.FontWeight.W_700), class_dd, board_dd, stream_dd, goal_dd, ft.ElevatedButton("Save", on_click=save), msg], spacing=8), padding=12)
+        scan_col = ft.Column([], spacing=4)
+        check_btn = ft.ElevatedButton("Check My Uploads")
+        fix_btn = ft.ElevatedButton("Check & Fix")
+        def show_report(report, fix):
+            scan_col.controls.clear()
+            verb = "Removed" if fix else "Found"
+            scan_col.controls.append(ft.Text(f"Checked {report['scanned']} PDFs ({report['rehashed']} re-read)"))
+            scan_col.controls.append(ft.Text(f"{verb} {len(report['dangling'])} of your notes with missing files"))
+            for r in report["dangling"]:
+                scan_col.controls.append(ft.Text(f"  {r['title']}", size=11))
+            scan_col.controls.append(ft.Text(f"{verb} {len(report['orphans'])} of your files with no note entry"))
+            for fp in report["orphans"]:
+                scan_col.controls.append(ft.Text(f"  {os.path.basename(fp)}", size=11))
+            scan_col.controls.append(ft.Text(f"Found {len(report['truncated'])} damaged or truncated PDFs"))
+            for fp in report["truncated"]:
+                scan_col.controls.append(ft.Text(f"  {fp}", size=11))
+            scan_col.controls.append(ft.Text(f"Found {len(report['duplicates'])} sets of identical PDFs"))
+            for group in report["duplicates"]:
+                scan_col.controls.append(ft.Text("  " + ", ".join(os.path.basename(fp) for fp in group), size=11))
+        def run_scan(fix):
+            check_btn.disabled = fix_btn.disabled = True
+            scan_col.controls[:] = [ft.Text("Scanning uploads...")]
+            page.update()
+            def work():
+                try:
+                    show_report(scan_uploads(fix=fix, username=state["user"]), fix)
+                except Exception as ex:
+                    scan_col.controls[:] = [ft.Text(f"Scan failed: {ex}", color=ft.Colors.RED_700)]
+                check_btn.disabled = fix_btn.disabled = False
+                page.update()
+            threading.Thread(target=work, daemon=True).start()
+        def confirm_fix(e):
+            def close(ev=None):
+                dlg.open = False
+                page.update()
+            def confirm(ev):
+                close()
+                run_scan(True)
+            dlg = ft.AlertDialog(
+                title=ft.Text("Fix uploads?"),
+                content=ft.Text("This removes your notes whose files are missing and deletes your files in the notes folder that have no note entry. Other users' notes and the Books folder are not changed. This cannot be undone."),
+                actions=[ft.TextButton("Cancel", on_click=close), ft.ElevatedButton("Fix", on_click=confirm)]
+            )
+            page.dialog = dlg
+            dlg.open = True
+            page.update()
+        check_btn.on_click = lambda e: run_scan(False)
+        fix_btn.on_click = confirm_fix
+        main_content.content = ft.Container(ft.Column([
+            ft.Text("Settings", size=18, weight=ft.FontWeight.W_700), class_dd, board_dd, stream_dd, goal_dd, ft.ElevatedButton("Save", on_click=save), msg,
+            ft.Divider(),
+            ft.Text("Uploads", size=16, weight=ft.FontWeight.W_600),
+            ft.Row([check_btn, fix_btn]),
+            scan_col
+        ], spacing=8, scroll=ft.ScrollMode.AUTO), padding=12)
         page.update()
 
     def open_file(path):